@@ -4,9 +4,13 @@ Connects to deployed FastAPI on Render.com
 """
 
 import streamlit as st
-import requests
+import httpx
 import pandas as pd
 import os
+import time
+import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # ============================================================
 # CONFIG
@@ -18,50 +22,282 @@ st.set_page_config(
 )
 
 # API URL - Use environment variable or default to deployed Render API
-API_URL = os.environ.get("API_URL", "https://fraud-detection-test-deployment.onrender.com/")
+# Trailing slash stripped so f"{API_URL}/path" never builds "//path" (extra redirect round-trip)
+API_URL = os.environ.get("API_URL", "https://fraud-detection-test-deployment.onrender.com").rstrip("/")
+
+# Endpoints built once at import instead of on every rerun
+PREDICT_URL = f"{API_URL}/predict"
+MODEL_INFO_URL = f"{API_URL}/model-info"
+LOGS_URL = f"{API_URL}/logs/summary"
+API_CAPTION = f"API: `{API_URL}`"
+
+# Used when the API is asleep and category_classes can't be fetched
+_FALLBACK_CATEGORIES = tuple(sorted([
+    "Grocery", "Electronics", "Clothing", "Restaurant/Cafeteria",
+    "Cash Withdrawal", "Health/Beauty", "Domestic Transport",
+    "Sports/Outdoors", "Holliday/Travel", "Jewelery"
+]))
+
+# Read bound is long enough for the retry budget to ride out a cold start
+REQUEST_TIMEOUT = httpx.Timeout(90.0, connect=5.0)
+
+# Cold start / transient gateway statuses worth backing off on - 4xx (auth, validation) never are
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+# POST /predict is logged server-side - a 502/504 may come back after it already ran,
+# so only retry when the API definitely didn't process it (connect failures are handled
+# by the transport, and 503 means the service never took the request)
+POST_RETRY_STATUSES = frozenset([503])
+MAX_RETRIES = 4
+# Dropped connections mid-response (cold start, HTTP/2 GOAWAY) - retried for non-POSTs only
+READ_RETRIES = 2
+BACKOFF_FACTOR = 1.5
+# Upper bound on any single sleep, including server-sent Retry-After
+MAX_BACKOFF = BACKOFF_FACTOR * 2 ** MAX_RETRIES
+
+# ============================================================
+# HTTP CLIENT
+# ============================================================
+@st.cache_resource
+def get_client():
+    """Shared HTTP/2 client - one TLS connection multiplexes every API call."""
+    # Connect errors are retried (with backoff) by the transport itself
+    transport = httpx.HTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        retries=MAX_RETRIES
+    )
+    return httpx.Client(
+        transport=transport,
+        timeout=REQUEST_TIMEOUT,
+        headers={"Accept-Encoding": "gzip", "Accept": "application/json"}
+    )
+
+CLIENT = get_client()
+
+
+class CircuitOpen(Exception):
+    """Raised instead of hitting the network while the breaker is open."""
+
+    def __init__(self, retry_in):
+        super().__init__(f"API unavailable - retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Fail fast while the API is confirmed down: CLOSED -> OPEN -> HALF_OPEN."""
+
+    def __init__(self, failure_threshold=3, recovery_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._cond = threading.Condition()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "CLOSED"
+        if time.monotonic() - self.opened_at >= self.recovery_timeout:
+            return "HALF_OPEN"
+        return "OPEN"
+
+    def time_until_half_open(self):
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+    def before_call(self):
+        with self._cond:
+            while True:
+                state = self.state
+                if state == "OPEN":
+                    raise CircuitOpen(self.time_until_half_open())
+                if state == "CLOSED":
+                    return
+                # HALF_OPEN: one trial call goes through; the rest wait for its outcome
+                if not self.probing:
+                    self.probing = True
+                    return
+                self._cond.wait()
+
+    def record_success(self):
+        with self._cond:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+            self._cond.notify_all()
+
+    def record_failure(self):
+        # A failed HALF_OPEN probe is already over the threshold, so it re-opens too
+        with self._cond:
+            self.probing = False
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._cond.notify_all()
+
+
+@st.cache_resource
+def get_breaker():
+    """One breaker per worker process - an outage is the same for every session."""
+    return CircuitBreaker(failure_threshold=3, recovery_timeout=30.0)
+
+BREAKER = get_breaker()
+
+
+def api_request(method, url, **kwargs):
+    """Send a request on the shared client, backing off exponentially on RETRY_STATUSES
+    (POST_RETRY_STATUSES for non-idempotent POSTs) and, for non-POSTs, on READ_RETRIES
+    dropped connections.
+
+    Calls that still fail after retrying count against BREAKER.
+    """
+    retry_statuses = POST_RETRY_STATUSES if method == "POST" else RETRY_STATUSES
+    read_retries = 0 if method == "POST" else READ_RETRIES
+    BREAKER.before_call()
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = CLIENT.request(method, url, **kwargs)
+            except (httpx.ReadError, httpx.RemoteProtocolError):
+                if read_retries == 0 or attempt == MAX_RETRIES:
+                    raise
+                read_retries -= 1
+                time.sleep(min(BACKOFF_FACTOR * 2 ** attempt, MAX_BACKOFF))
+                continue
+            if response.status_code not in retry_statuses or attempt == MAX_RETRIES:
+                break
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else BACKOFF_FACTOR * 2 ** attempt
+            time.sleep(min(delay, MAX_BACKOFF))
+    except Exception:
+        # Any client-side failure settles the call, so a HALF_OPEN probe never stays stuck
+        BREAKER.record_failure()
+        raise
+    if response.status_code >= 500:
+        BREAKER.record_failure()
+    else:
+        BREAKER.record_success()
+    return response
+
+
+@st.cache_resource
+def get_executor():
+    """Small thread pool for firing independent API calls in parallel."""
+    # 2 for the Model Stats fetches + 1 for the startup warmup
+    return ThreadPoolExecutor(max_workers=3)
+
+
+# ============================================================
+# CACHED API CALLS
+# ============================================================
+@st.cache_resource
+def get_model_info_snapshot():
+    """Last good /model-info payload, so the form can read it without touching the network."""
+    return {"lock": threading.Lock()}
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_model_info(url: str) -> dict:
+    """Model info is static per deployment, so share it across reruns and sessions."""
+    r = api_request("GET", url)
+    r.raise_for_status()
+    model_info = orjson.loads(r.content)
+    get_model_info_snapshot()["model_info"] = model_info
+    return model_info
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def fetch_log_summary(url: str) -> dict:
+    """Logs change slowly enough that a short TTL keeps counters near real-time."""
+    r = api_request("GET", url)
+    r.raise_for_status()
+    return orjson.loads(r.content)
+
+
+@st.cache_resource
+def start_warmup():
+    """Wake the API once per worker so the cold start overlaps with users reading/filling the form.
+
+    The warmup is the first fetch_model_info call, so its response fills the cache.
+    """
+    return get_executor().submit(fetch_model_info, MODEL_INFO_URL)
+
+_warm_future = start_warmup()
+
+
+def refresh_model_info_snapshot():
+    """Retry /model-info in the background until a payload lands in the snapshot.
+
+    Covers a startup warmup that failed - at most one retry in flight, and none while
+    BREAKER is OPEN.
+    """
+    snapshot = get_model_info_snapshot()
+    if "model_info" in snapshot or not _warm_future.done() or BREAKER.state == "OPEN":
+        return
+    with snapshot["lock"]:
+        pending = snapshot.get("refresh")
+        if pending is None or pending.done():
+            snapshot["refresh"] = get_executor().submit(fetch_model_info, MODEL_INFO_URL)
+
+
+# ============================================================
+# CACHED RENDERING
+# ============================================================
+@st.cache_data(show_spinner=False)
+def build_metrics_frame(metrics_data: tuple):
+    """Build the labelled metrics table once per distinct metrics payload."""
+    metrics_df = pd.DataFrame(dict(metrics_data)).T
+    if len(metrics_df.columns) != 5:
+        return None
+    metrics_df.columns = ['Accuracy', 'F1 Score', 'Precision', 'Recall', 'ROC AUC']
+    metrics_df.index = ['XGBoost', 'Random Forest', 'Ensemble']
+    return metrics_df
 
 # ============================================================
 # HEADER
 # ============================================================
 st.title("🔍 Fraud Detection System")
 st.markdown("*Ensemble Model: XGBoost + Random Forest Pipelines*")
-st.caption(f"API: `{API_URL}`")
+st.caption(API_CAPTION)
 
 # ============================================================
 # TABS
 # ============================================================
 tab1, tab2 = st.tabs(["🎯 Prediction", "📊 Model Stats"])
 
+# st.tabs runs every tab's body on each rerun - only fetch Model Stats once the user asks
+st.session_state.setdefault("tab2_opened", False)
+
 # ============================================================
 # TAB 1: PREDICTION
 # ============================================================
-with tab1:
-    st.header("Transaction Fraud Check")
-    
+# Fragment: widget changes rerun only the form, not the whole script
+@st.fragment
+def prediction_form():
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Transaction Details")
         
-        # Try to get categories from API (use cached fallback if API sleeping)
-        try:
-            cat_response = requests.get(f"{API_URL}/model-info", timeout=3)
-            if cat_response.status_code == 200:
-                categories = cat_response.json().get('category_classes', [])
-            else:
-                categories = []
-        except:
-            categories = []  # Will use fallback below
+        # Categories come from the last good /model-info payload (filled by the startup
+        # warmup, a background retry or Model Stats) - the form never waits on the network.
+        # Until one has arrived, or while the API is sleeping, use the fallback list.
+        refresh_model_info_snapshot()
+        model_info = get_model_info_snapshot().get("model_info", {})
+        categories = model_info.get('category_classes', [])
         
-        # Fallback categories
-        if not categories:
-            categories = [
-                "Grocery", "Electronics", "Clothing", "Restaurant/Cafeteria",
-                "Cash Withdrawal", "Health/Beauty", "Domestic Transport",
-                "Sports/Outdoors", "Holliday/Travel", "Jewelery"
-            ]
+        categories = tuple(sorted(categories)) if categories else _FALLBACK_CATEGORIES
         
-        category = st.selectbox("Category", sorted(categories), index=0)
+        # Options change once the live list arrives, which resets the widget - keep the pick
+        prev_category = st.session_state.get("category_choice")
+        category = st.selectbox(
+            "Category",
+            categories,
+            index=categories.index(prev_category) if prev_category in categories else 0
+        )
+        st.session_state["category_choice"] = category
         amount = st.number_input("Amount ($)", min_value=0.01, max_value=50000.0, value=150.50)
         age = st.slider("Customer Age", min_value=18, max_value=90, value=35)
         days_until_expiry = st.number_input("Days Until Card Expires", min_value=0, max_value=3650, value=365)
@@ -112,10 +348,15 @@ with tab1:
         
         try:
             with st.spinner("Analyzing transaction..."):
-                response = requests.post(f"{API_URL}/predict", json=payload, timeout=30)
+                response = api_request(
+                    "POST",
+                    PREDICT_URL,
+                    content=orjson.dumps(payload),
+                    headers={"Content-Type": "application/json"}
+                )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 
                 st.markdown("---")
                 
@@ -135,33 +376,18 @@ with tab1:
                 st.caption(f"Transaction ID: {result['transaction_id']}")
                 
                 # Model predictions - derive prediction from probability
-                xgb_prob = result['xgboost_probability']
-                rf_prob = result['random_forest_probability']
-                ens_prob = result['ensemble_probability']
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric(
-                        "XGBoost",
-                        f"{xgb_prob*100:.1f}%",
-                        delta="FRAUD" if xgb_prob >= 0.5 else "LEGIT",
-                        delta_color="inverse"
-                    )
-                
-                with col2:
-                    st.metric(
-                        "Random Forest",
-                        f"{rf_prob*100:.1f}%",
-                        delta="FRAUD" if rf_prob >= 0.5 else "LEGIT",
-                        delta_color="inverse"
-                    )
+                probs = [
+                    ("XGBoost", result['xgboost_probability']),
+                    ("Random Forest", result['random_forest_probability']),
+                    ("Ensemble", result['ensemble_probability'])
+                ]
+                prob_labels = [f"{p*100:.1f}%" for _, p in probs]
                 
-                with col3:
-                    st.metric(
-                        "Ensemble",
-                        f"{ens_prob*100:.1f}%",
-                        delta="FRAUD" if ens_prob >= 0.5 else "LEGIT",
+                for col, (name, p), label in zip(st.columns(3), probs, prob_labels):
+                    col.metric(
+                        name,
+                        label,
+                        delta="FRAUD" if p >= 0.5 else "LEGIT",
                         delta_color="inverse"
                     )
                 
@@ -180,36 +406,77 @@ with tab1:
             else:
                 st.error(f"API Error: {response.text}")
                 
-        except requests.exceptions.ConnectionError:
+        except CircuitOpen as e:
+            st.warning(f"⏸️ {e}")
+        except httpx.TimeoutException:
+            st.warning("Request timed out. The API may be waking up - try again.")
+        except httpx.TransportError:
+            # Connect/read/write errors and dropped HTTP/2 connections (after timeouts above)
             st.error(f"Cannot connect to API at {API_URL}")
             st.info("The API may be sleeping. Try again in 30 seconds.")
-        except requests.exceptions.Timeout:
-            st.warning("Request timed out. The API may be waking up - try again.")
         except Exception as e:
             st.error(f"Error: {e}")
 
+
+with tab1:
+    st.header("Transaction Fraud Check")
+    prediction_form()
+
 # ============================================================
 # TAB 2: MODEL STATS
 # ============================================================
-with tab2:
-    st.header("Model Performance & Monitoring")
+def show_api_error(e):
+    """Report a failed Model Stats fetch in place of the section it would have filled."""
+    if isinstance(e, CircuitOpen):
+        st.warning(f"⏸️ {e}")
+    elif isinstance(e, httpx.TimeoutException):
+        st.warning("⏰ API is waking up (free tier cold start)")
+        st.info("This takes 30-60 seconds on first request. Please refresh the page in a moment.")
+    elif isinstance(e, httpx.TransportError):
+        st.warning(f"Cannot connect to API at {API_URL}")
+        st.info("The API may be sleeping (free tier). Try again in 30 seconds.")
+    elif isinstance(e, httpx.HTTPStatusError):
+        st.error(f"API Error: {e}")
+    else:
+        st.error(f"Error: {e}")
+
+
+# Fragment: Refresh logs reruns only this tab's fetch + render
+@st.fragment
+def model_stats():
+    if not st.session_state.tab2_opened:
+        st.button(
+            "📊 Load Model Stats",
+            on_click=lambda: st.session_state.update(tab2_opened=True)
+        )
+        return
+    
+    if st.button("🔄 Refresh logs"):
+        fetch_log_summary.clear()
     
+    with st.spinner("Waking up API (free tier may take 30-60 seconds)..."):
+        # Fire both requests at once - tab is only as slow as the slowest call
+        pool = get_executor()
+        # Piggyback on a still-running warmup instead of stacking a second cold-start request
+        if _warm_future.done():
+            f_info = pool.submit(fetch_model_info, MODEL_INFO_URL)
+        else:
+            f_info = _warm_future
+        f_log = pool.submit(fetch_log_summary, LOGS_URL)
+        wait([f_info, f_log])
+    
+    # Each section renders on its own - one failing endpoint doesn't hide the other
     try:
-        with st.spinner("Waking up API (free tier may take 30-60 seconds)..."):
-            info_response = requests.get(f"{API_URL}/model-info", timeout=60)
-            log_response = requests.get(f"{API_URL}/logs/summary", timeout=60)
-        
-        if info_response.status_code == 200:
-            model_info = info_response.json()
-            
+        model_info = f_info.result()
+        if model_info:
             st.subheader("Model Metrics (Test Set)")
             
             metrics_data = model_info.get('metrics', {})
             if metrics_data:
-                metrics_df = pd.DataFrame(metrics_data).T
-                if len(metrics_df.columns) == 5:
-                    metrics_df.columns = ['Accuracy', 'F1 Score', 'Precision', 'Recall', 'ROC AUC']
-                    metrics_df.index = ['XGBoost', 'Random Forest', 'Ensemble']
+                # Keep API order - index labels below are assigned positionally
+                metrics_df = build_metrics_frame(tuple(metrics_data.items()))
+                if metrics_df is not None:
+                    # Styler is built per render - st.dataframe mutates it while rendering
                     st.dataframe(
                         metrics_df.style.highlight_max(axis=0, color='lightgreen').format("{:.4f}"),
                         use_container_width=True
@@ -235,11 +502,13 @@ with tab2:
                 st.markdown("**Numeric:**")
                 for feat in model_info.get('numeric_columns', []):
                     st.write(f"- `{feat}`")
-        
-        # Logs
-        if log_response.status_code == 200:
-            log_summary = log_response.json()
-            
+    except Exception as e:
+        show_api_error(e)
+    
+    # Logs
+    try:
+        log_summary = f_log.result()
+        if log_summary:
             st.markdown("---")
             st.subheader("Inference Monitoring")
             
@@ -254,19 +523,19 @@ with tab2:
                 # Show count, not percentage - easier to understand
                 drift_count = log_summary.get('predictions_with_drift', 0)
                 st.metric("Drift Warnings", drift_count)
-                
-    except requests.exceptions.Timeout:
-        st.warning("⏰ API is waking up (free tier cold start)")
-        st.info("This takes 30-60 seconds on first request. Please refresh the page in a moment.")
-    except requests.exceptions.ConnectionError:
-        st.warning(f"Cannot connect to API at {API_URL}")
-        st.info("The API may be sleeping (free tier). Try again in 30 seconds.")
     except Exception as e:
-        st.error(f"Error: {e}")
+        show_api_error(e)
+
+
+with tab2:
+    st.header("Model Performance & Monitoring")
+    model_stats()
 
 # ============================================================
 # SIDEBAR
 # ============================================================
+# Static, and fragments can't write to the sidebar - emitted only on full reruns,
+# which fragment interactions no longer trigger
 st.sidebar.markdown("---")
 st.sidebar.markdown("### About")
 st.sidebar.markdown("""